@@ -20,6 +20,13 @@ description:
 - Groups by namespace, namespace_vmis and labels.
 - Uses the kubectl connection plugin to access the Kubernetes cluster.
 - Uses kubevirt.(yml|yaml) YAML configuration file to set parameter values.
+- Only the status and the used metadata of VirtualMachineInstances are kept after fetching them, e.g. their
+  spec and managedFields are not available to the inventory and not stored in the inventory cache.
+- Namespaces and Services can be listed slightly out of date, so a Service which was just created might not be
+  used yet.
+- If no namespaces or more than two namespaces are configured, VirtualMachineInstances and Services are listed
+  across all namespaces, which requires permission to list them cluster-wide. Without it every namespace is
+  listed on its own.
 
 extends_documentation_fragment:
 - inventory_cache
@@ -94,6 +101,8 @@ options:
         description:
         - List of namespaces. If not specified, will fetch all VirtualMachineInstances for all namespaces
           the user is authorized to access.
+        - If more than two namespaces are specified, VirtualMachineInstances and services are listed across
+          all namespaces with a single request each. If this is forbidden, every namespace is listed on its own.
       label_selector:
         description:
         - Define a label selector to select a subset of the fetched VirtualMachineInstances.
@@ -116,11 +125,24 @@ options:
         description:
         - Specify the used KubeVirt API version.
         default: "kubevirt.io/v1"
+      emit_annotations:
+        description:
+        - Whether to set the annotations of VirtualMachineInstances as host variable. Disable this to keep
+          annotations out of the inventory and the inventory cache.
+        type: bool
+        default: True
+      only_running:
+        description:
+        - Only add VirtualMachineInstances in the C(Running) phase to the inventory. By default
+          VirtualMachineInstances in other phases which already report an IP address are added as well.
+        type: bool
+        default: False
 
 requirements:
 - "python >= 3.6"
 - "kubernetes >= 12.0.0"
 - "PyYAML >= 3.11"
+- "orjson (optional, speeds up decoding of large lists)"
 """
 
 EXAMPLES = """
@@ -156,29 +178,41 @@ connections:
   context: 'awx/192-168-64-4:8443/developer'
 """
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from json import loads
+from functools import lru_cache
+from string import Formatter
 from typing import (
     Any,
+    Callable,
     Dict,
+    Iterator,
     List,
     Optional,
-    Tuple,
-    Union,
+    Set,
 )
 
 try:
-    from kubernetes.dynamic.resource import ResourceField
-    from kubernetes.dynamic.exceptions import DynamicApiError
+    from orjson import loads
 except ImportError:
+    from json import loads
 
-    class ResourceField:
-        pass
+try:
+    from kubernetes.dynamic.exceptions import (
+        DynamicApiError,
+        ForbiddenError,
+    )
+except ImportError:
 
     class DynamicApiError(Exception):
         pass
 
+    class ForbiddenError(DynamicApiError):
+        pass
+
 
+from ansible.module_utils.common.yaml import HAS_LIBYAML
 from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
 
 from ansible_collections.kubernetes.core.plugins.module_utils.common import (
@@ -194,12 +228,77 @@ from ansible_collections.kubernetes.core.plugins.module_utils.k8s.client import
 LABEL_KUBEVIRT_IO_DOMAIN = "kubevirt.io/domain"
 TYPE_LOADBALANCER = "LoadBalancer"
 TYPE_NODEPORT = "NodePort"
+PHASE_RUNNING = "Running"
+# The metadata of VirtualMachineInstances used by the inventory
+VMI_METADATA_FIELDS = frozenset(
+    (
+        "annotations",
+        "clusterName",
+        "labels",
+        "name",
+        "namespace",
+        "resourceVersion",
+        "uid",
+    )
+)
+HOST_NAME_TRANSLATION = str.maketrans({".": "-", ":": "_"})
+VALID_FILE_SUFFIXES = ("kubevirt.yml", "kubevirt.yaml")
+MAX_WORKERS = 8
+# Explicitly configured namespaces are listed with one cluster-wide LIST above this
+MAX_NAMESPACED_LISTS = 2
+SANITIZE_CACHE_SIZE = 4096
+PAGE_SIZE = 500
+ANY_RESOURCE_VERSION = "0"
+DEFAULT_HOST_FORMAT = "{namespace}-{name}"
+HOST_FORMAT_FIELDS = ("namespace", "name", "uid")
+
+# API clients are pooled by kubernetes.core, so discovered resources can be
+# shared by all connections and inventory sources using the same client.
+_RESOURCES = {}
 
 
 class KubeVirtInventoryException(Exception):
     pass
 
 
+def _format_default_host_name(namespace: str, name: str, uid: str) -> str:
+    return f"{namespace}-{name}"
+
+
+def _compile_host_format(host_format: str) -> Callable[..., str]:
+    """
+    _compile_host_format parses a host_format once and returns a function
+    which formats host names without parsing the format again.
+    """
+    if host_format == DEFAULT_HOST_FORMAT:
+        return _format_default_host_name
+
+    try:
+        parsed = list(Formatter().parse(host_format))
+    except ValueError as exc:
+        raise KubeVirtInventoryException(f"Invalid host_format: {exc}") from exc
+
+    parts = []
+    for literal, field, spec, conversion in parsed:
+        # Leave format specs, conversions and unknown fields to str.format
+        if field is not None and (
+            spec or conversion or field not in HOST_FORMAT_FIELDS
+        ):
+            return host_format.format
+        parts.append((literal, field))
+
+    def format_host_name(namespace: str, name: str, uid: str) -> str:
+        values = {"namespace": namespace, "name": name, "uid": uid}
+        return "".join(
+            [
+                literal if field is None else literal + str(values[field])
+                for literal, field in parts
+            ]
+        )
+
+    return format_host_name
+
+
 @dataclass
 class GetVmiOptions:
     """
@@ -213,6 +312,8 @@ class GetVmiOptions:
     use_service: Optional[bool] = None
     base_domain: Optional[str] = None
     host_format: Optional[str] = None
+    emit_annotations: Optional[bool] = None
+    only_running: Optional[bool] = None
 
     def __post_init__(self):
         # Set defaults in __post_init__ to allow instatiating class with None values
@@ -223,7 +324,13 @@ class GetVmiOptions:
         if self.use_service is None:
             self.use_service = True
         if self.host_format is None:
-            self.host_format = "{namespace}-{name}"
+            self.host_format = DEFAULT_HOST_FORMAT
+        if self.emit_annotations is None:
+            self.emit_annotations = True
+        if self.only_running is None:
+            self.only_running = False
+
+        self.format_host_name = _compile_host_format(self.host_format)
 
 
 class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
@@ -242,12 +349,11 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         get_default_host_name strips URL schemes from the host name and
         replaces invalid characters.
         """
-        return (
-            host.replace("https://", "")
-            .replace("http://", "")
-            .replace(".", "-")
-            .replace(":", "_")
-        )
+        if host.startswith("https://"):
+            host = host[8:]
+        elif host.startswith("http://"):
+            host = host[7:]
+        return host.translate(HOST_NAME_TRANSLATION)
 
     @staticmethod
     def format_dynamic_api_exc(exc: DynamicApiError) -> str:
@@ -264,6 +370,49 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
         return f"{exc.status} Reason: {exc.reason}"
 
+    @staticmethod
+    def list_objects(resource: Any, **kwargs: Any) -> Dict:
+        """
+        list_objects lists objects of a resource and returns the decoded response.
+        The objects are returned as plain dicts instead of being deserialized into
+        ResourceFields, which would have to be converted back into dicts.
+        """
+        return loads(resource.get(serialize=False, **kwargs).data)
+
+    @classmethod
+    def paged_list(cls, resource: Any, **kwargs: Any) -> Iterator[Dict]:
+        """
+        paged_list yields the objects of a resource while listing them in pages
+        of PAGE_SIZE items, so only one raw response is held at a time. What is
+        kept of the yielded objects is up to the caller.
+        The pages are read from etcd, the watch cache of the API server does
+        not support paging on most supported Kubernetes versions.
+        """
+        _continue = None
+        while True:
+            page = cls.list_objects(
+                resource, limit=PAGE_SIZE, _continue=_continue, **kwargs
+            )
+            yield from page.get("items") or []
+            _continue = (page.get("metadata") or {}).get("continue")
+            if not _continue:
+                return
+
+    @classmethod
+    def cached_list(cls, resource: Any, **kwargs: Any) -> List[Dict]:
+        """
+        cached_list lists all objects of a resource with a single request which
+        the API server serves from its watch cache instead of reading it from etcd.
+        The watch cache ignores a limit, so the list is not paged and the whole
+        list is held in memory.
+        """
+        return (
+            cls.list_objects(
+                resource, resource_version=ANY_RESOURCE_VERSION, **kwargs
+            ).get("items")
+            or []
+        )
+
     @staticmethod
     def get_host_from_service(service: Dict, node_name: str) -> Optional[str]:
         """
@@ -303,20 +452,29 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     def __init__(self) -> None:
         super().__init__()
         self.host_format = None
+        self._added_groups = set()
+        # Label keys and values recur across VMIs, memoize their group names
+        self._sanitize_cached = lru_cache(maxsize=SANITIZE_CACHE_SIZE)(
+            self._sanitize_group_name
+        )
 
     def verify_file(self, path: str) -> None:
         """
         verify_file ensures the inventory file is compatible with this plugin.
         """
-        return super().verify_file(path) and path.endswith(
-            ("kubevirt.yml", "kubevirt.yaml")
-        )
+        # Check the file name first, it is cheaper than the checks of the parent
+        return path.endswith(VALID_FILE_SUFFIXES) and super().verify_file(path)
 
     def parse(self, inventory: Any, loader: Any, path: str, cache: bool = True) -> None:
         """
         parse runs basic setup of the inventory.
         """
         super().parse(inventory, loader, path)
+        if not HAS_LIBYAML:
+            self.display.vvv(
+                "PyYAML was built without libyaml, reading the inventory configuration "
+                + "will be slower. Consider installing PyYAML with libyaml bindings."
+            )
         cache_key = self._get_cache_prefix(path)
         config_data = self._read_config_data(path)
         self.host_format = config_data.get("host_format")
@@ -326,7 +484,8 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         """
         setup checks for availability of the Kubernetes Python client,
         gets the configured connections and runs fetch_objects on them.
-        If there is a cache it is returned instead.
+        If there is a cache it is used instead and it is updated with
+        the fetched objects otherwise.
         """
         connections = config_data.get("connections")
 
@@ -336,20 +495,31 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
                 + f"Try `pip install kubernetes`. Detail: {k8s_import_exception}"
             )
 
-        source_data = None
-        if cache and cache_key in self._cache:
+        user_cache_setting = self.get_option("cache")
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        results = None
+        if attempt_to_read_cache:
             try:
-                source_data = self._cache[cache_key]
+                results = self._cache[cache_key]
             except KeyError:
-                pass
+                cache_needs_update = True
+
+        if results is None:
+            results = self.fetch_objects(connections)
+
+        if cache_needs_update:
+            self._cache[cache_key] = results
 
-        if not source_data:
-            self.fetch_objects(connections)
+        self.populate_inventory(results)
 
-    def fetch_objects(self, connections: Dict) -> None:
+    def fetch_objects(self, connections: Dict) -> List:
         """
-        fetch_objects populates the inventory with every configured connection.
+        fetch_objects fetches the objects of every configured connection
+        and returns them as plain data which can be cached.
         """
+        results = []
         if connections:
             if not isinstance(connections, list):
                 raise KubeVirtInventoryException("Expecting connections to be a list.")
@@ -363,38 +533,78 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
                 name = connection.get(
                     "name", self.get_default_host_name(client.configuration.host)
                 )
-                if connection.get("namespaces"):
-                    namespaces = connection["namespaces"]
-                else:
-                    namespaces = self.get_available_namespaces(client)
+                namespaces = connection.get("namespaces")
+                network_name = connection.get(
+                    "network_name", connection.get("interface_name")
+                )
+
+                # The base domain is only used for kubesecondarydns derived host names,
+                # do not look up the cluster domain if it is not needed.
+                base_domain = connection.get("base_domain")
+                if (
+                    "base_domain" not in connection
+                    and connection.get("kube_secondary_dns")
+                    and network_name is not None
+                ):
+                    base_domain = self.get_cluster_domain(client)
 
                 opts = GetVmiOptions(
                     connection.get("api_version"),
                     connection.get("label_selector"),
-                    connection.get("network_name", connection.get("interface_name")),
+                    network_name,
                     connection.get("kube_secondary_dns"),
                     connection.get("use_service"),
-                    connection.get("base_domain", self.get_cluster_domain(client)),
+                    base_domain,
                     self.host_format,
+                    connection.get("emit_annotations"),
+                    connection.get("only_running"),
                 )
-                for namespace in namespaces:
-                    self.get_vmis_for_namespace(client, name, namespace, opts)
+                if namespaces and len(namespaces) <= MAX_NAMESPACED_LISTS:
+                    objects = self.get_vmis_for_namespaces(client, namespaces, opts)
+                else:
+                    objects = self.get_vmis_for_all_namespaces(client, opts, namespaces)
+                results.append({"name": name, "objects": objects})
         else:
             client = get_api_client()
             name = self.get_default_host_name(client.configuration.host)
-            namespaces = self.get_available_namespaces(client)
             opts = GetVmiOptions(host_format=self.host_format)
-            for namespace in namespaces:
-                self.get_vmis_for_namespace(client, name, namespace, opts)
+            objects = self.get_vmis_for_all_namespaces(client, opts)
+            results.append({"name": name, "objects": objects})
+
+        return results
+
+    def populate_inventory(self, results: List) -> None:
+        """
+        populate_inventory adds groups and hosts for the objects of every
+        connection returned by fetch_objects to the inventory.
+        """
+        self._added_groups = set()
+        for result in results:
+            # The cluster group is shared by all namespaces of a connection
+            name = self._sanitize_cached(result["name"])
+            self._add_group(name)
+            for objects in result["objects"]:
+                self._populate_namespace(name, objects["namespace"], objects["hosts"])
+
+    @staticmethod
+    def get_resource(client: K8SClient, api_version: str, kind: str) -> Any:
+        """
+        get_resource looks up a resource of the API server and remembers it
+        for further lookups with the same underlying dynamic client.
+        """
+        key = (client.client, api_version, kind)
+        resource = _RESOURCES.get(key)
+        if resource is None:
+            resource = client.resources.get(api_version=api_version, kind=kind)
+            _RESOURCES[key] = resource
+        return resource
 
     def get_cluster_domain(self, client: K8SClient) -> Optional[str]:
         """
         get_cluster_domain tries to get the base domain of an OpenShift cluster.
         """
         try:
-            v1_dns = client.resources.get(
-                api_version="config.openshift.io/v1", kind="DNS"
-            )
+            v1_dns = self.get_resource(client, "config.openshift.io/v1", "DNS")
         except Exception:
             # If resource not found return None
             return None
@@ -412,206 +622,323 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         get_available_namespaces lists all namespaces accessible with the
         configured credentials and returns them.
         """
-        v1_namespace = client.resources.get(api_version="v1", kind="Namespace")
+        v1_namespace = self.get_resource(client, "v1", "Namespace")
         try:
-            obj = v1_namespace.get()
+            return [
+                namespace["metadata"]["name"]
+                for namespace in self.cached_list(v1_namespace)
+            ]
         except DynamicApiError as exc:
             self.display.debug(exc)
             raise KubeVirtInventoryException(
                 f"Error fetching Namespace list: {self.format_dynamic_api_exc(exc)}"
             ) from exc
-        return [namespace.metadata.name for namespace in obj.items]
 
-    def get_vmis_for_namespace(
-        self, client: K8SClient, name: str, namespace: str, opts: GetVmiOptions
-    ) -> None:
+    def get_vmis_for_all_namespaces(
+        self,
+        client: K8SClient,
+        opts: GetVmiOptions,
+        namespaces: Optional[List] = None,
+    ) -> List:
         """
-        get_vmis_for_namespace lists all VirtualMachineInstances in a namespace
-        and adds groups and hosts to the inventory.
+        get_vmis_for_all_namespaces fetches the VirtualMachineInstances and services
+        of all namespaces with a single cluster-wide LIST each and returns them
+        grouped by namespace. If namespaces are passed in, only objects in those
+        are kept while paging through the lists. Otherwise all namespaces available
+        to the user are used. If listing across all namespaces is forbidden it falls
+        back to listing every namespace on its own.
         """
-        vmi_client = client.resources.get(
-            api_version=opts.api_version, kind="VirtualMachineInstance"
+        if not namespaces:
+            namespaces = self.get_available_namespaces(client)
+        if not namespaces:
+            return []
+
+        vmi_client = self.get_resource(
+            client, opts.api_version, "VirtualMachineInstance"
         )
+        service_client = self.get_resource(client, "v1", "Service")
+
+        wanted = set(namespaces)
         try:
-            vmi_list = vmi_client.get(
-                namespace=namespace, label_selector=opts.label_selector
+            # Services are listed first, the VMI list is much larger and should
+            # not be paged through if listing across all namespaces is forbidden.
+            services = self.get_ssh_services(service_client, namespaces=wanted)
+            vmi_items = self._fetch_vmis(vmi_client, None, opts, wanted)
+        except KubeVirtInventoryException as exc:
+            if not isinstance(exc.__cause__, ForbiddenError):
+                raise
+            self.display.debug(
+                "Listing across all namespaces is forbidden, listing each namespace instead"
             )
+            return self.get_vmis_for_namespaces(client, namespaces, opts)
+
+        vmis = defaultdict(list)
+        for vmi in vmi_items:
+            vmis[vmi["metadata"]["namespace"]].append(vmi)
+
+        return [
+            {
+                "namespace": namespace,
+                "hosts": self._build_hosts(
+                    vmis[namespace], services.get(namespace, {}), opts
+                ),
+            }
+            for namespace in namespaces
+        ]
+
+    def get_vmis_for_namespaces(
+        self,
+        client: K8SClient,
+        namespaces: List,
+        opts: GetVmiOptions,
+    ) -> List:
+        """
+        get_vmis_for_namespaces concurrently fetches the VirtualMachineInstances and
+        services of all passed in namespaces and returns them grouped by namespace.
+        """
+        if not namespaces:
+            return []
+
+        # Look up the resources once, discovery is not meant to be used concurrently
+        vmi_client = self.get_resource(
+            client, opts.api_version, "VirtualMachineInstance"
+        )
+        service_client = self.get_resource(client, "v1", "Service")
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(namespaces))
+        ) as executor:
+            services = [
+                executor.submit(
+                    self.get_ssh_services_for_namespace, service_client, namespace
+                )
+                for namespace in namespaces
+            ]
+            vmis = [
+                executor.submit(self._fetch_vmis, vmi_client, namespace, opts)
+                for namespace in namespaces
+            ]
+            # Results are consumed in submission order to keep the inventory stable.
+            # No task waits on another one, the hosts are built here once both
+            # lists of a namespace are available.
+            return [
+                {
+                    "namespace": namespace,
+                    "hosts": self._build_hosts(
+                        namespace_vmis.result(), namespace_services.result(), opts
+                    ),
+                }
+                for namespace, namespace_vmis, namespace_services in zip(
+                    namespaces, vmis, services
+                )
+            ]
+
+    def _fetch_vmis(
+        self,
+        vmi_client: Any,
+        namespace: Optional[str],
+        opts: GetVmiOptions,
+        namespaces: Optional[Set] = None,
+    ) -> List:
+        """
+        _fetch_vmis lists all VirtualMachineInstances in a namespace,
+        or in all namespaces if no namespace is passed. VirtualMachineInstances
+        which do not report any interfaces yet, are not in one of the passed in
+        namespaces or, if only_running is set, are not running are dropped right
+        away and only the used metadata and the status of the remaining ones are kept.
+        """
+        only_running = opts.only_running
+        metadata_fields = VMI_METADATA_FIELDS
+        if not opts.emit_annotations:
+            metadata_fields = metadata_fields - {"annotations"}
+
+        try:
+            # The field selector of custom resources is limited to metadata.name and
+            # metadata.namespace, so unused parts of the objects like the spec or
+            # managedFields are dropped here.
+            vmis = [
+                {
+                    "metadata": {
+                        key: value
+                        for key, value in vmi["metadata"].items()
+                        if key in metadata_fields
+                    },
+                    "status": vmi["status"],
+                }
+                for vmi in self.paged_list(
+                    vmi_client,
+                    namespace=namespace,
+                    label_selector=opts.label_selector,
+                )
+                if vmi.get("status", {}).get("interfaces")
+                and (namespaces is None or vmi["metadata"]["namespace"] in namespaces)
+                and (not only_running or vmi["status"].get("phase") == PHASE_RUNNING)
+            ]
         except DynamicApiError as exc:
             self.display.debug(exc)
             raise KubeVirtInventoryException(
                 f"Error fetching VirtualMachineInstance list: {self.format_dynamic_api_exc(exc)}"
             ) from exc
 
-        services = self.get_ssh_services_for_namespace(client, namespace)
-
-        namespace_group = f"namespace_{namespace}"
-        namespace_vmis_group = f"{namespace_group}_vmis"
+        return vmis
 
-        name = self._sanitize_group_name(name)
-        namespace_group = self._sanitize_group_name(namespace_group)
-        namespace_vmis_group = self._sanitize_group_name(namespace_vmis_group)
-
-        self.inventory.add_group(name)
-        self.inventory.add_group(namespace_group)
-        self.inventory.add_child(name, namespace_group)
-        self.inventory.add_group(namespace_vmis_group)
-        self.inventory.add_child(namespace_group, namespace_vmis_group)
-
-        for vmi in vmi_list.items:
-            if not (vmi.status and vmi.status.interfaces):
-                continue
-
-            # Find interface by its name:
-            if opts.network_name is None:
-                interface = vmi.status.interfaces[0]
+    def _build_hosts(self, vmis: List, services: Dict, opts: GetVmiOptions) -> List:
+        """
+        _build_hosts builds the name, label groups and host variables of every
+        VirtualMachineInstance of a namespace which reports an IP address on
+        the selected interface. The result is plain data which can be cached
+        and is added to the inventory by _populate_namespace.
+        """
+        # Bind frequently used lookups to locals, the loop runs for every VMI
+        sanitize = self._sanitize_cached
+        get_ansible_host_and_port = self.get_ansible_host_and_port
+        format_host_name = opts.format_host_name
+        emit_annotations = opts.emit_annotations
+        network_name = opts.network_name
+
+        hosts = []
+        for vmi in vmis:
+            metadata = vmi["metadata"]
+            status = vmi["status"]
+            interfaces = status["interfaces"]
+
+            # Find interface by its name, most often it is the first one:
+            if network_name is None or interfaces[0].get("name") == network_name:
+                interface = interfaces[0]
             else:
                 interface = next(
-                    (i for i in vmi.status.interfaces if i.name == opts.network_name),
-                    None,
+                    (i for i in interfaces if i.get("name") == network_name), None
                 )
 
             # If interface is not found or IP address is not reported skip this VM:
-            if interface is None or interface.ipAddress is None:
+            if interface is None or interface.get("ipAddress") is None:
                 continue
 
-            vmi_name = opts.host_format.format(
-                namespace=vmi.metadata.namespace,
-                name=vmi.metadata.name,
-                uid=vmi.metadata.uid,
-            )
-            vmi_groups = []
-            vmi_annotations = (
-                {}
-                if not vmi.metadata.annotations
-                else self.__resource_field_to_dict(vmi.metadata.annotations)
+            vmi_name = format_host_name(
+                namespace=metadata.get("namespace"),
+                name=metadata.get("name"),
+                uid=metadata.get("uid"),
             )
+            vmi_labels = metadata.get("labels") or {}
 
-            if vmi.metadata.labels:
-                # create a group for each label_value
-                for key, value in vmi.metadata.labels:
-                    group_name = f"label_{key}_{value}"
-                    group_name = self._sanitize_group_name(group_name)
-                    if group_name not in vmi_groups:
-                        vmi_groups.append(group_name)
-                    self.inventory.add_group(group_name)
-                vmi_labels = self.__resource_field_to_dict(vmi.metadata.labels)
-            else:
-                vmi_labels = {}
-
-            # Add vmi to the namespace group, and to each label_value group
-            self.inventory.add_host(vmi_name)
-            self.inventory.add_child(namespace_vmis_group, vmi_name)
-            for group in vmi_groups:
-                self.inventory.add_child(group, vmi_name)
-
-            # Set up the connection
-            self.inventory.set_variable(vmi_name, "ansible_connection", "ssh")
-            self.set_ansible_host_and_port(
-                vmi,
-                vmi_name,
-                interface.ipAddress,
-                services.get(vmi.metadata.labels.get(LABEL_KUBEVIRT_IO_DOMAIN)),
-                opts,
-            )
+            # create a group for each label_value
+            vmi_groups = {
+                sanitize(f"label_{key}_{value}") for key, value in vmi_labels.items()
+            }
 
-            # Add hostvars from metadata
-            self.inventory.set_variable(vmi_name, "object_type", "vmi")
-            self.inventory.set_variable(vmi_name, "labels", vmi_labels)
-            self.inventory.set_variable(vmi_name, "annotations", vmi_annotations)
-            self.inventory.set_variable(
-                vmi_name, "cluster_name", vmi.metadata.clusterName
-            )
-            self.inventory.set_variable(
-                vmi_name, "resource_version", vmi.metadata.resourceVersion
+            hostvars = {
+                # Set up the connection
+                "ansible_connection": "ssh",
+                **get_ansible_host_and_port(
+                    vmi,
+                    interface["ipAddress"],
+                    services.get(vmi_labels.get(LABEL_KUBEVIRT_IO_DOMAIN)),
+                    opts,
+                ),
+                # Add hostvars from metadata
+                "object_type": "vmi",
+                "labels": vmi_labels,
+                "cluster_name": metadata.get("clusterName"),
+                "resource_version": metadata.get("resourceVersion"),
+                "uid": metadata.get("uid"),
+                # Add hostvars from status
+                "vmi_active_pods": status.get("activePods") or {},
+                "vmi_conditions": status.get("conditions") or [],
+                "vmi_guest_os_info": status.get("guestOSInfo") or {},
+                "vmi_interfaces": interfaces,
+                "vmi_launcher_container_image_version": status.get(
+                    "launcherContainerImageVersion"
+                ),
+                "vmi_migration_method": status.get("migrationMethod"),
+                "vmi_migration_transport": status.get("migrationTransport"),
+                "vmi_node_name": status.get("nodeName"),
+                "vmi_phase": status.get("phase"),
+                "vmi_phase_transition_timestamps": status.get(
+                    "phaseTransitionTimestamps"
+                )
+                or [],
+                "vmi_qos_class": status.get("qosClass"),
+                "vmi_virtual_machine_revision_name": status.get(
+                    "virtualMachineRevisionName"
+                ),
+                "vmi_volume_status": status.get("volumeStatus") or [],
+            }
+            if emit_annotations:
+                hostvars["annotations"] = metadata.get("annotations") or {}
+            hosts.append(
+                {"name": vmi_name, "groups": sorted(vmi_groups), "hostvars": hostvars}
             )
-            self.inventory.set_variable(vmi_name, "uid", vmi.metadata.uid)
 
-            # Add hostvars from status
-            vmi_active_pods = (
-                {}
-                if not vmi.status.activePods
-                else self.__resource_field_to_dict(vmi.status.activePods)
-            )
-            self.inventory.set_variable(vmi_name, "vmi_active_pods", vmi_active_pods)
-            vmi_conditions = (
-                []
-                if not vmi.status.conditions
-                else [self.__resource_field_to_dict(c) for c in vmi.status.conditions]
-            )
-            self.inventory.set_variable(vmi_name, "vmi_conditions", vmi_conditions)
-            vmi_guest_os_info = (
-                {}
-                if not vmi.status.guestOSInfo
-                else self.__resource_field_to_dict(vmi.status.guestOSInfo)
-            )
-            self.inventory.set_variable(
-                vmi_name, "vmi_guest_os_info", vmi_guest_os_info
-            )
-            vmi_interfaces = (
-                []
-                if not vmi.status.interfaces
-                else [self.__resource_field_to_dict(i) for i in vmi.status.interfaces]
-            )
-            self.inventory.set_variable(vmi_name, "vmi_interfaces", vmi_interfaces)
-            self.inventory.set_variable(
-                vmi_name,
-                "vmi_launcher_container_image_version",
-                vmi.status.launcherContainerImageVersion,
-            )
-            self.inventory.set_variable(
-                vmi_name, "vmi_migration_method", vmi.status.migrationMethod
-            )
-            self.inventory.set_variable(
-                vmi_name, "vmi_migration_transport", vmi.status.migrationTransport
-            )
-            self.inventory.set_variable(vmi_name, "vmi_node_name", vmi.status.nodeName)
-            self.inventory.set_variable(vmi_name, "vmi_phase", vmi.status.phase)
-            vmi_phase_transition_timestamps = (
-                []
-                if not vmi.status.phaseTransitionTimestamps
-                else [
-                    self.__resource_field_to_dict(p)
-                    for p in vmi.status.phaseTransitionTimestamps
-                ]
-            )
-            self.inventory.set_variable(
-                vmi_name,
-                "vmi_phase_transition_timestamps",
-                vmi_phase_transition_timestamps,
-            )
-            self.inventory.set_variable(vmi_name, "vmi_qos_class", vmi.status.qosClass)
-            self.inventory.set_variable(
-                vmi_name,
-                "vmi_virtual_machine_revision_name",
-                vmi.status.virtualMachineRevisionName,
-            )
-            vmi_volume_status = (
-                []
-                if not vmi.status.volumeStatus
-                else [self.__resource_field_to_dict(v) for v in vmi.status.volumeStatus]
-            )
-            self.inventory.set_variable(
-                vmi_name, "vmi_volume_status", vmi_volume_status
-            )
+        return hosts
+
+    def _populate_namespace(self, name: str, namespace: str, hosts: List) -> None:
+        """
+        _populate_namespace adds groups and hosts of the VirtualMachineInstances
+        in a namespace to the inventory. The passed in name of the cluster group
+        must already be sanitized and added to the inventory.
+        """
+        namespace_group = self._sanitize_cached(f"namespace_{namespace}")
+        namespace_vmis_group = self._sanitize_cached(f"{namespace_group}_vmis")
 
-    def get_ssh_services_for_namespace(self, client: K8SClient, namespace: str) -> Dict:
+        self._add_group(namespace_group)
+        self.inventory.add_child(name, namespace_group)
+        self._add_group(namespace_vmis_group)
+        self.inventory.add_child(namespace_group, namespace_vmis_group)
+
+        add_host = self.inventory.add_host
+        add_child = self.inventory.add_child
+        populate_host_vars = self._populate_host_vars
+
+        # Add vmis to the namespace group and collect the hosts of each label_value group
+        hosts_by_group = defaultdict(list)
+        for host in hosts:
+            host_name = host["name"]
+            add_host(host_name, group=namespace_vmis_group)
+            populate_host_vars(host_name, host["hostvars"])
+            for group in host["groups"]:
+                hosts_by_group[group].append(host_name)
+
+        # Add each label_value group once and its hosts to it
+        for group, group_hosts in hosts_by_group.items():
+            self._add_group(group)
+            for host_name in group_hosts:
+                add_child(group, host_name)
+
+    def get_ssh_services_for_namespace(self, v1_service: Any, namespace: str) -> Dict:
         """
         get_ssh_services_for_namespace retrieves all services of a namespace exposing port 22/ssh.
         The services are mapped to the name of the corresponding domain.
         """
-        v1_service = client.resources.get(api_version="v1", kind="Service")
+        return self.get_ssh_services(v1_service, namespace).get(namespace, {})
+
+    def get_ssh_services(
+        self,
+        v1_service: Any,
+        namespace: Optional[str] = None,
+        namespaces: Optional[Set] = None,
+    ) -> Dict:
+        """
+        get_ssh_services retrieves all services exposing port 22/ssh, in all namespaces
+        if no namespace is passed. If namespaces are passed in, services in other
+        namespaces are dropped. The services are mapped to their namespace and
+        the name of the corresponding domain.
+        """
         try:
-            service_list = v1_service.get(
-                namespace=namespace,
-            )
+            service_list = self.cached_list(v1_service, namespace=namespace)
         except DynamicApiError as exc:
             self.display.debug(exc)
             raise KubeVirtInventoryException(
                 f"Error fetching Service list: {self.format_dynamic_api_exc(exc)}"
             ) from exc
 
-        services = {}
-        for service in service_list.items:
+        services = defaultdict(dict)
+        for service in service_list:
+            if (
+                namespaces is not None
+                and service["metadata"]["namespace"] not in namespaces
+            ):
+                continue
+
             # Continue if service is not of type LoadBalancer or NodePort
             if service.get("spec", {}).get("type") not in (
                 TYPE_LOADBALANCER,
@@ -628,61 +955,58 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
             # Only add the service to the dict if the domain selector is present
             domain = service["spec"].get("selector", {}).get(LABEL_KUBEVIRT_IO_DOMAIN)
             if domain is not None:
-                services[domain] = service
+                services[service["metadata"]["namespace"]][domain] = service
 
         return services
 
-    def set_ansible_host_and_port(
+    def get_ansible_host_and_port(
         self,
         vmi: Dict,
-        vmi_name: str,
         ip_address: str,
         service: Optional[Dict],
         opts: GetVmiOptions,
-    ) -> None:
+    ) -> Dict:
         """
-        set_ansible_host_and_port sets the ansible_host and possibly the ansible_port var.
+        get_ansible_host_and_port returns the ansible_host and possibly the ansible_port var.
         Secondary interfaces have priority over a service exposing SSH
         """
-        ansible_host = None
         if opts.kube_secondary_dns and opts.network_name is not None:
             # Set ansible_host to the kubesecondarydns derived host name if enabled
             # See https://github.com/kubevirt/kubesecondarydns#parameters
+            metadata = vmi["metadata"]
             ansible_host = (
-                f"{opts.network_name}.{vmi.metadata.name}.{vmi.metadata.namespace}.vm"
+                f"{opts.network_name}.{metadata['name']}.{metadata['namespace']}.vm"
             )
             if opts.base_domain is not None:
                 ansible_host += f".{opts.base_domain}"
-        elif opts.use_service and service is not None:
+            return {"ansible_host": ansible_host}
+
+        if opts.use_service and service is not None:
             # Set ansible_host and ansible_port to the host and port from the LoadBalancer
             # or NodePort service exposing SSH
-            host = self.get_host_from_service(service, vmi.status.nodeName)
+            host = self.get_host_from_service(service, vmi["status"].get("nodeName"))
             port = self.get_port_from_service(service)
             if host is not None and port is not None:
-                ansible_host = host
-                self.inventory.set_variable(vmi_name, "ansible_port", port)
+                return {"ansible_host": host, "ansible_port": port}
 
         # Default to the IP address of the interface if ansible_host was not set prior
-        if ansible_host is None:
-            ansible_host = ip_address
+        return {"ansible_host": ip_address}
 
-        self.inventory.set_variable(vmi_name, "ansible_host", ansible_host)
-
-    def __resource_field_to_dict(
-        self, field: Union[Dict, List, ResourceField, Tuple]
-    ) -> Dict:
+    def _add_group(self, group: str) -> None:
         """
-        Replace this with ResourceField.to_dict() once available in a stable release of
-        the Kubernetes Python client
-        See
-        https://github.com/kubernetes-client/python/blob/main/kubernetes/base/dynamic/resource.py#L393
+        _add_group adds a group to the inventory unless it was already
+        added while populating the inventory.
         """
-        if isinstance(field, ResourceField):
-            return {
-                k: self.__resource_field_to_dict(v) for k, v in field.__dict__.items()
-            }
-
-        if isinstance(field, (list, tuple)):
-            return [self.__resource_field_to_dict(item) for item in field]
+        if group not in self._added_groups:
+            self.inventory.add_group(group)
+            self._added_groups.add(group)
 
-        return field
+    def _populate_host_vars(self, host: str, hostvars: Dict) -> None:
+        """
+        _populate_host_vars sets all passed in hostvars on a host.
+        """
+        # Set the variables on the host object directly, this skips resolving
+        # the host by name and the debug message for every single variable.
+        set_variable = self.inventory.get_host(host).set_variable
+        for key, value in hostvars.items():
+            set_variable(key, value)
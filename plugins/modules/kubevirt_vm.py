@@ -109,7 +109,6 @@ requirements:
 - "kubernetes >= 12.0.0"
 - "PyYAML >= 3.11"
 - "jsonpatch"
-- "jinja2"
 """
 
 EXAMPLES = """
@@ -219,9 +218,7 @@ result:
       type: str
 """
 
-from copy import deepcopy
 from typing import Dict
-import traceback
 
 from ansible_collections.kubernetes.core.plugins.module_utils.ansiblemodule import (
     AnsibleModule,
@@ -241,96 +238,76 @@ from ansible_collections.kubernetes.core.plugins.module_utils.k8s.exceptions imp
     CoreException,
 )
 
-try:
-    import yaml
-except ImportError:
-    HAS_YAML = False
-    YAML_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_YAML = True
-    YAML_IMPORT_ERROR = None
-
-try:
-    from jinja2 import Environment
-except ImportError:
-    HAS_JINJA = False
-    JINJA_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_JINJA = True
-    JINJA_IMPORT_ERROR = None
-
-
-VM_TEMPLATE = """
-apiVersion: {{ api_version }}
-kind: VirtualMachine
-metadata:
-  {% if name %}
-  name: "{{ name }}"
-  {% endif %}
-  {% if generate_name %}
-  generateName: "{{ generate_name }}"
-  {% endif %}
-  namespace: "{{ namespace }}"
-  {% if annotations %}
-  annotations:
-    {{ annotations | to_yaml | indent(4) }}
-  {%- endif %}
-  {% if labels %}
-  labels:
-    {{ labels | to_yaml | indent(4) }}
-  {%- endif %}
-spec:
-  running: {{ running }}
-  {% if instancetype %}
-  instancetype:
-    {{ instancetype | to_yaml | indent(4) }}
-  {%- endif %}
-  {% if preference %}
-  preference:
-    {{ preference | to_yaml | indent(4) }}
-  {%- endif %}
-  {% if data_volume_templates %}
-  dataVolumeTemplates:
-    {{ data_volume_templates | to_yaml | indent(4) }}
-  {%- endif %}
-  template:
-    {% if annotations or labels %}
-    metadata:
-      {% if annotations %}
-      annotations:
-        {{ annotations | to_yaml | indent(8) }}
-      {%- endif %}
-      {% if labels %}
-      labels:
-        {{ labels | to_yaml | indent(8) }}
-      {%- endif %}
-    {% endif %}
-    spec:
-    {% if spec %}
-      {{ spec | to_yaml | indent (6) }}
-    {%- else %}
-      domain:
-        devices: {}
-    {% endif %}
-"""
+# Condition of a VirtualMachine which is ready, only read by the waiter
+WAIT_CONDITION = {"type": "Ready", "status": True}
 
 
-def render_template(params: Dict) -> str:
+def build_definition(params: Dict) -> Dict:
     """
-    render_template uses Jinja2 to render the VM_TEMPLATE into a string.
+    build_definition builds the resource definition of a VirtualMachine
+    from the module parameters.
     """
-    env = Environment(autoescape=False, trim_blocks=True, lstrip_blocks=True)
-    env.filters["to_yaml"] = lambda data, *_, **kw: yaml.dump(
-        data, allow_unicode=True, default_flow_style=False, **kw
-    )
+    metadata = {"namespace": params["namespace"]}
+    if params["name"]:
+        metadata["name"] = params["name"]
+    if params["generate_name"]:
+        metadata["generateName"] = params["generate_name"]
+
+    if params["state"] == "absent":
+        # Deleting a VirtualMachine only needs to identify it
+        return {
+            "apiVersion": params["api_version"],
+            "kind": "VirtualMachine",
+            "metadata": metadata,
+        }
+
+    # The template shares labels and annotations with the VirtualMachine
+    template_metadata = {}
+    if params["annotations"]:
+        metadata["annotations"] = params["annotations"]
+        template_metadata["annotations"] = dict(params["annotations"])
+    if params["labels"]:
+        metadata["labels"] = params["labels"]
+        template_metadata["labels"] = dict(params["labels"])
+
+    template = {}
+    if template_metadata:
+        template["metadata"] = template_metadata
+    template["spec"] = params["spec"] or {"domain": {"devices": {}}}
+
+    spec = {"running": params["running"]}
+    if params["instancetype"]:
+        spec["instancetype"] = params["instancetype"]
+    if params["preference"]:
+        spec["preference"] = params["preference"]
+    if params["data_volume_templates"]:
+        spec["dataVolumeTemplates"] = params["data_volume_templates"]
+    spec["template"] = template
+
+    return {
+        "apiVersion": params["api_version"],
+        "kind": "VirtualMachine",
+        "metadata": metadata,
+        "spec": spec,
+    }
+
 
-    template = env.from_string(VM_TEMPLATE.strip())
-    return template.render(params)
+def _clone_spec(spec: Dict) -> Dict:
+    """
+    _clone_spec copies an argument spec and the options of each argument.
+    This is enough to keep the argument specs of kubernetes.core unchanged
+    and much cheaper than a deepcopy.
+    """
+    return {
+        key: dict(value) if type(value) is dict else value
+        for key, value in spec.items()
+    }
 
 
-def arg_spec() -> Dict:
+def _build_arg_spec() -> Dict:
     """
-    arg_spec defines the argument spec of this module.
+    _build_arg_spec builds the argument spec of this module. It is called
+    once when the module is imported.
     """
     spec = {
         "api_version": {"default": "kubevirt.io/v1"},
@@ -348,17 +325,28 @@ def arg_spec() -> Dict:
         "wait_sleep": {"type": "int", "default": 5},
         "wait_timeout": {"type": "int", "default": 120},
     }
-    spec.update(deepcopy(AUTH_ARG_SPEC))
-    spec.update(deepcopy(COMMON_ARG_SPEC))
+    spec.update(_clone_spec(AUTH_ARG_SPEC))
+    spec.update(_clone_spec(COMMON_ARG_SPEC))
     spec["delete_options"] = {
         "type": "dict",
         "default": None,
-        "options": deepcopy(DELETE_OPTS_ARG_SPEC),
+        "options": _clone_spec(DELETE_OPTS_ARG_SPEC),
     }
 
     return spec
 
 
+ARG_SPEC = _build_arg_spec()
+
+
+def arg_spec() -> Dict:
+    """
+    arg_spec defines the argument spec of this module.
+    """
+    # The argument spec is not modified by Ansible, a shallow copy is enough
+    return dict(ARG_SPEC)
+
+
 def main() -> None:
     """
     main instantiates the AnsibleK8SModule, creates the resource
@@ -376,11 +364,11 @@ def main() -> None:
         supports_check_mode=True,
     )
 
-    # Set resource_definition to our rendered template
-    module.params["resource_definition"] = render_template(module.params)
+    # Set resource_definition to the definition created from the parameters
+    module.params["resource_definition"] = build_definition(module.params)
 
     # Set wait_condition to allow waiting for the ready state of the VirtualMachine
-    module.params["wait_condition"] = {"type": "Ready", "status": True}
+    module.params["wait_condition"] = WAIT_CONDITION
 
     try:
         runner.run_module(module)
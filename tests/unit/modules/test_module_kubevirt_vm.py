@@ -6,10 +6,11 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import unittest
-
+from types import MappingProxyType
 from unittest.mock import patch, ANY
 
+import pytest
+
 from ansible.module_utils import basic
 from ansible_collections.kubernetes.core.plugins.module_utils.k8s import runner
 from ansible_collections.kubernetes.kubevirt.plugins.modules import kubevirt_vm
@@ -22,7 +23,8 @@ from ansible_collections.kubernetes.kubevirt.tests.unit.utils.ansible_module_moc
     get_api_client
 )
 
-FIXTURE1 = {
+# The fixtures are shared by all tests, expose them as read-only views
+_FIXTURE1 = {
     "apiVersion": "kubevirt.io/v1",
     "kind": "VirtualMachine",
     "metadata": {
@@ -82,45 +84,9 @@ FIXTURE1 = {
     }
 }
 
-METADATA = '''apiVersion: kubevirt.io/v1
-kind: VirtualMachine
-metadata:
-  name: "testvm"
-  namespace: "default"
-  labels:
-    environment: staging
-    service: loadbalancer
-spec:
-  running: True
-  instancetype:
-    name: u1.medium
-  preference:
-    name: fedora
-  dataVolumeTemplates:
-    - metadata:
-        name: testdv
-      spec:
-        source:
-          registry:
-            url: docker://quay.io/containerdisks/fedora:latest
-        storage:
-          accessModes:
-          - ReadWriteOnce
-          resources:
-            requests:
-              storage: 5Gi
-  template:
-    metadata:
-      labels:
-        environment: staging
-        service: loadbalancer
-    spec:
-      domain:
-        devices: {}
-      terminationGracePeriodSeconds: 180
-'''
+FIXTURE1 = MappingProxyType(_FIXTURE1)
 
-FIXTURE2 = {
+_FIXTURE2 = {
     'name': 'testvm',
     'namespace': 'default',
     'state': 'present',
@@ -169,99 +135,138 @@ FIXTURE2 = {
     'username': None, 'password': None, 'validate_certs': None, 'ca_cert': None, 'client_cert': None, 'client_key': None,
     'proxy': None, 'no_proxy': None, 'proxy_headers': None, 'persist_config': None, 'impersonate_user': None,
     'impersonate_groups': None, 'delete_options': None,
-    'resource_definition': METADATA,
+    'resource_definition': FIXTURE1,
     'wait_condition': {
         'type': 'Ready',
         'status': True
     }
 }
 
+FIXTURE2 = MappingProxyType(_FIXTURE2)
 
-class TestCreateVM(unittest.TestCase):
-    def setUp(self):
-        self.mock_module_helper = patch.multiple(
-            basic.AnsibleModule,
-            exit_json=exit_json,
-            fail_json=fail_json
-        )
-        self.mock_module_helper.start()
 
-        self.mock_runner = patch.multiple(
-            runner,
-            get_api_client=get_api_client
-        )
-        self.mock_runner.start()
+@pytest.fixture(scope="module", autouse=True)
+def patch_ansible_module():
+    # The patches do not hold any per test state,
+    # start them once for all tests of this module
+    with patch.multiple(
+        basic.AnsibleModule,
+        exit_json=exit_json,
+        fail_json=fail_json
+    ), patch.multiple(
+        runner,
+        get_api_client=get_api_client
+    ):
+        yield
 
-        # Stop the patch after test execution
-        # like tearDown but executed also when the setup failed
-        self.addCleanup(self.mock_module_helper.stop)
-        self.addCleanup(self.mock_runner.stop)
 
-    def test_module_fail_when_required_args_missing(self):
-        with self.assertRaises(AnsibleFailJson):
-            set_module_args({})
-            kubevirt_vm.main()
+def test_module_fail_when_required_args_missing():
+    with pytest.raises(AnsibleFailJson):
+        set_module_args({})
+        kubevirt_vm.main()
 
-    def test_create(self):
-        set_module_args(
-            {
-                "name": "testvm",
-                "namespace": "default",
-                "state": "present",
-                "labels": {
-                    "service": "loadbalancer",
-                    "environment": "staging"
-                },
-                'instancetype': {
-                    'name': 'u1.medium'
-                },
-                'preference': {
-                    'name': 'fedora'
-                },
-                'data_volume_templates': [
-                    {
-                        'metadata': {
-                            'name': 'testdv'
-                        },
-                        'spec': {
-                            'source': {
-                                'registry': {
-                                    'url': 'docker://quay.io/containerdisks/fedora:latest'
-                                },
+
+def test_create():
+    set_module_args(
+        {
+            "name": "testvm",
+            "namespace": "default",
+            "state": "present",
+            "labels": {
+                "service": "loadbalancer",
+                "environment": "staging"
+            },
+            'instancetype': {
+                'name': 'u1.medium'
+            },
+            'preference': {
+                'name': 'fedora'
+            },
+            'data_volume_templates': [
+                {
+                    'metadata': {
+                        'name': 'testdv'
+                    },
+                    'spec': {
+                        'source': {
+                            'registry': {
+                                'url': 'docker://quay.io/containerdisks/fedora:latest'
                             },
-                            'storage': {
-                                'accessModes': [
-                                    'ReadWriteOnce'
-                                ],
-                                'resources': {
-                                    'requests': {
-                                        'storage': '5Gi'
-                                    }
+                        },
+                        'storage': {
+                            'accessModes': [
+                                'ReadWriteOnce'
+                            ],
+                            'resources': {
+                                'requests': {
+                                    'storage': '5Gi'
                                 }
                             }
                         }
                     }
-                ],
-                'spec': {
-                    'domain': {
-                        'devices': {}
-                    },
-                    'terminationGracePeriodSeconds': 180
                 }
+            ],
+            'spec': {
+                'domain': {
+                    'devices': {}
+                },
+                'terminationGracePeriodSeconds': 180
+            }
+        }
+    )
+    with patch.object(runner, "perform_action") as mock_run_command:
+        mock_run_command.return_value = (
+            {
+                "method": "create",
+                "changed": True,
+                "result": "success"
             }
+        )  # successful execution
+        with pytest.raises(AnsibleExitJson):
+            kubevirt_vm.main()
+        mock_run_command.assert_called_once_with(
+            ANY,
+            FIXTURE1,
+            FIXTURE2,
         )
-        with patch.object(runner, "perform_action") as mock_run_command:
-            mock_run_command.return_value = (
-                {
-                    "method": "create",
-                    "changed": True,
-                    "result": "success"
+
+
+def test_delete():
+    set_module_args(
+        {
+            "name": "testvm",
+            "namespace": "default",
+            "state": "absent",
+            "labels": {
+                "service": "loadbalancer",
+                "environment": "staging"
+            },
+            'spec': {
+                'domain': {
+                    'devices': {}
                 }
-            )  # successful execution
-            with self.assertRaises(AnsibleExitJson) as result:
-                kubevirt_vm.main()
-            mock_run_command.assert_called_once_with(
-                ANY,
-                FIXTURE1,
-                FIXTURE2,
-            )
+            }
+        }
+    )
+    with patch.object(runner, "perform_action") as mock_run_command:
+        mock_run_command.return_value = (
+            {
+                "method": "delete",
+                "changed": True,
+                "result": "success"
+            }
+        )  # successful execution
+        with pytest.raises(AnsibleExitJson):
+            kubevirt_vm.main()
+        mock_run_command.assert_called_once_with(
+            ANY,
+            {
+                "apiVersion": "kubevirt.io/v1",
+                "kind": "VirtualMachine",
+                "metadata": {
+                    "name": "testvm",
+                    "namespace": "default"
+                }
+            },
+            ANY,
+        )
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Red Hat, Inc.
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ansible.inventory.data import InventoryData
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic.exceptions import ForbiddenError
+
+from ansible_collections.kubernetes.kubevirt.plugins.inventory import kubevirt
+from ansible_collections.kubernetes.kubevirt.plugins.inventory.kubevirt import (
+    InventoryModule,
+)
+
+CACHE_KEY = "kubevirt-test"
+
+
+def vmi(namespace, name, phase="Running", labels=None, interfaces=None):
+    return {
+        "apiVersion": "kubevirt.io/v1",
+        "kind": "VirtualMachineInstance",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"{name}-uid",
+            "resourceVersion": "1",
+            "labels": {"app": "test"} if labels is None else labels,
+        },
+        "spec": {"domain": {"devices": {}}},
+        "status": {
+            "phase": phase,
+            "nodeName": "node01",
+            "interfaces": (
+                [{"name": "default", "ipAddress": "10.10.10.10"}]
+                if interfaces is None
+                else interfaces
+            ),
+        },
+    }
+
+
+def service(namespace, name, domain, service_type, port, node_port=None, ip=None):
+    return {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": {"name": name, "namespace": namespace},
+        "spec": {
+            "type": service_type,
+            "selector": {"kubevirt.io/domain": domain},
+            "ports": [{"port": port, "targetPort": 22, "nodePort": node_port}],
+        },
+        "status": {"loadBalancer": {"ingress": [{"ip": ip}] if ip else []}},
+    }
+
+
+VMIS = [
+    vmi("default", "testvm1"),
+    vmi("default", "testvm2"),
+    vmi("ns1", "testvm3"),
+    vmi("ns2", "testvm4"),
+    vmi("ns3", "testvm5"),
+]
+ALL_HOSTS = sorted(
+    f"{vmi['metadata']['namespace']}-{vmi['metadata']['name']}" for vmi in VMIS
+)
+
+
+class FakeResource:
+    """
+    FakeResource stands in for a resource of the dynamic client. It serves
+    paged JSON lists like the API server and records the passed arguments.
+    """
+
+    def __init__(self, objects, forbid_all_namespaces=False):
+        self.objects = objects
+        self.forbid_all_namespaces = forbid_all_namespaces
+        self.calls = []
+
+    def get(self, serialize=True, namespace=None, limit=None, _continue=None, **kwargs):
+        assert not serialize
+        self.calls.append(
+            {"namespace": namespace, "limit": limit, "_continue": _continue, **kwargs}
+        )
+        if self.forbid_all_namespaces and namespace is None:
+            raise ForbiddenError(ApiException(status=403, reason="Forbidden"))
+
+        items = [
+            obj
+            for obj in self.objects
+            if namespace is None or obj["metadata"].get("namespace") == namespace
+        ]
+        metadata = {"resourceVersion": "1"}
+        if limit:
+            start = int(_continue or 0)
+            end = start + limit
+            if end < len(items):
+                metadata["continue"] = str(end)
+            items = items[start:end]
+
+        return SimpleNamespace(
+            data=json.dumps({"metadata": metadata, "items": items}).encode()
+        )
+
+
+class FakeClient:
+    """
+    FakeClient stands in for the K8SClient returned by get_api_client.
+    """
+
+    def __init__(self, vmis=None, services=None, namespaces=None, forbidden=()):
+        self.configuration = SimpleNamespace(host="https://api.example.com:6443")
+        self.client = object()
+        self.vmis = FakeResource(
+            VMIS if vmis is None else vmis,
+            "VirtualMachineInstance" in forbidden,
+        )
+        self.services = FakeResource(services or [], "Service" in forbidden)
+        self.namespaces = FakeResource(
+            [
+                {"metadata": {"name": namespace}}
+                for namespace in (namespaces or ["default", "ns1", "ns2", "ns3"])
+            ]
+        )
+        kinds = {
+            "VirtualMachineInstance": self.vmis,
+            "Service": self.services,
+            "Namespace": self.namespaces,
+        }
+        self.resources = SimpleNamespace(
+            get=lambda api_version, kind: kinds[kind],
+        )
+
+    @property
+    def calls(self):
+        return self.vmis.calls + self.services.calls + self.namespaces.calls
+
+
+@pytest.fixture
+def client(mocker):
+    client = FakeClient()
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    return client
+
+
+@pytest.fixture
+def inventory(mocker):
+    # Discovered resources are remembered across plugin instances
+    mocker.patch.dict(kubevirt._RESOURCES, clear=True)
+
+    def make(cache_option=False, cache=None):
+        plugin = InventoryModule()
+        plugin.inventory = InventoryData()
+        plugin.set_option("cache", cache_option)
+        plugin._cache = {} if cache is None else cache
+        return plugin
+
+    return make
+
+
+def run_setup(plugin, connections=None, cache=True):
+    plugin.setup({"connections": connections}, cache, CACHE_KEY)
+
+
+def get_hostvars(plugin, host):
+    # InventoryData sets these for every host
+    return {
+        key: value
+        for key, value in plugin.inventory.get_host(host).vars.items()
+        if key not in ("inventory_dir", "inventory_file")
+    }
+
+
+def test_cache_miss_writes_cache(client, inventory):
+    plugin = inventory(cache_option=True)
+    run_setup(plugin)
+
+    assert client.calls
+    results = plugin._cache[CACHE_KEY]
+    assert [host["name"] for host in results[0]["objects"][0]["hosts"]] == [
+        "default-testvm1",
+        "default-testvm2",
+    ]
+    assert "default-testvm1" in plugin.inventory.hosts
+
+
+def test_cache_hit_does_not_call_api(mocker, client, inventory):
+    cache = {}
+    run_setup(inventory(cache_option=True, cache=cache))
+
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    plugin = inventory(cache_option=True, cache=cache)
+    run_setup(plugin)
+
+    get_api_client.assert_not_called()
+    assert sorted(plugin.inventory.hosts) == ALL_HOSTS
+
+
+def test_cache_refresh_refetches_and_rewrites(client, inventory):
+    cache = {CACHE_KEY: [{"name": "stale", "objects": []}]}
+    plugin = inventory(cache_option=True, cache=cache)
+    run_setup(plugin, cache=False)
+
+    assert client.calls
+    assert cache[CACHE_KEY][0]["name"] == "api-example-com_6443"
+    assert "default-testvm1" in plugin.inventory.hosts
+
+
+def test_cache_disabled_is_not_written(client, inventory):
+    plugin = inventory(cache_option=False)
+    run_setup(plugin)
+
+    assert client.calls
+    assert plugin._cache == {}
+
+
+@pytest.mark.parametrize(
+    "namespaces",
+    [
+        ["default"],
+        ["default", "ns1"],
+    ],
+)
+def test_few_namespaces_are_listed_on_their_own(client, inventory, namespaces):
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": namespaces}])
+
+    assert sorted(call["namespace"] for call in client.vmis.calls) == namespaces
+    assert sorted(call["namespace"] for call in client.services.calls) == namespaces
+    assert not client.namespaces.calls
+    assert sorted(plugin.inventory.hosts) == [
+        host for host in ALL_HOSTS if host.rsplit("-", 1)[0] in namespaces
+    ]
+
+
+def test_many_namespaces_are_listed_cluster_wide(client, inventory):
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default", "ns1", "ns2"]}])
+
+    assert [call["namespace"] for call in client.vmis.calls] == [None]
+    assert [call["namespace"] for call in client.services.calls] == [None]
+    # Only the configured namespaces are added
+    assert sorted(plugin.inventory.hosts) == [
+        "default-testvm1",
+        "default-testvm2",
+        "ns1-testvm3",
+        "ns2-testvm4",
+    ]
+    assert "namespace_ns3" not in plugin.inventory.groups
+
+
+def test_all_namespaces_are_listed_cluster_wide(client, inventory):
+    plugin = inventory()
+    run_setup(plugin)
+
+    assert len(client.namespaces.calls) == 1
+    assert [call["namespace"] for call in client.vmis.calls] == [None]
+    assert [call["namespace"] for call in client.services.calls] == [None]
+    assert sorted(plugin.inventory.hosts) == ALL_HOSTS
+
+
+@pytest.mark.parametrize("kind", ["VirtualMachineInstance", "Service"])
+def test_forbidden_cluster_wide_list_falls_back_to_namespaces(mocker, inventory, kind):
+    client = FakeClient(forbidden=(kind,))
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default", "ns1", "ns2"]}])
+
+    assert sorted(
+        call["namespace"] for call in client.vmis.calls if call["namespace"]
+    ) == ["default", "ns1", "ns2"]
+    assert sorted(
+        call["namespace"] for call in client.services.calls if call["namespace"]
+    ) == ["default", "ns1", "ns2"]
+    assert sorted(plugin.inventory.hosts) == [
+        "default-testvm1",
+        "default-testvm2",
+        "ns1-testvm3",
+        "ns2-testvm4",
+    ]
+
+
+def test_forbidden_service_list_skips_cluster_wide_vmi_list(mocker, inventory):
+    client = FakeClient(forbidden=("Service",))
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default", "ns1", "ns2"]}])
+
+    assert None not in [call["namespace"] for call in client.vmis.calls]
+
+
+def test_cluster_wide_list_keeps_configured_namespaces(mocker, client, inventory):
+    plugin = inventory()
+    vmis = plugin._fetch_vmis(
+        client.vmis, None, kubevirt.GetVmiOptions(), {"default", "ns2"}
+    )
+
+    assert [
+        (vmi["metadata"]["namespace"], vmi["metadata"]["name"]) for vmi in vmis
+    ] == [("default", "testvm1"), ("default", "testvm2"), ("ns2", "testvm4")]
+
+
+def test_forbidden_namespaced_list_raises(mocker, client, inventory):
+    mocker.patch.object(
+        client.vmis,
+        "get",
+        side_effect=ForbiddenError(ApiException(status=403, reason="Forbidden")),
+    )
+    plugin = inventory()
+
+    with pytest.raises(kubevirt.KubeVirtInventoryException, match="403"):
+        run_setup(plugin, [{"namespaces": ["default"]}])
+
+
+def test_continue_token_is_followed(mocker, client, inventory):
+    mocker.patch.object(kubevirt, "PAGE_SIZE", 2)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default", "ns1", "ns2"]}])
+
+    assert [(call["limit"], call["_continue"]) for call in client.vmis.calls] == [
+        (2, None),
+        (2, "2"),
+        (2, "4"),
+    ]
+    assert len(plugin.inventory.hosts) == 4
+
+
+@pytest.mark.parametrize(
+    "only_running,expected",
+    [
+        (None, ["default-testvm1", "default-testvm2"]),
+        (False, ["default-testvm1", "default-testvm2"]),
+        (True, ["default-testvm1"]),
+    ],
+)
+def test_only_running(mocker, inventory, only_running, expected):
+    client = FakeClient(
+        vmis=[vmi("default", "testvm1"), vmi("default", "testvm2", phase="Failed")]
+    )
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default"], "only_running": only_running}])
+
+    assert sorted(plugin.inventory.hosts) == expected
+
+
+@pytest.mark.parametrize(
+    "emit_annotations,annotations,expected",
+    [
+        (None, None, {}),
+        (True, None, {}),
+        (True, {"key": "value"}, {"key": "value"}),
+        (False, {"key": "value"}, None),
+    ],
+)
+def test_emit_annotations(mocker, inventory, emit_annotations, annotations, expected):
+    testvm = vmi("default", "testvm1")
+    if annotations is not None:
+        testvm["metadata"]["annotations"] = annotations
+    client = FakeClient(vmis=[testvm])
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory(cache_option=True)
+    run_setup(
+        plugin, [{"namespaces": ["default"], "emit_annotations": emit_annotations}]
+    )
+
+    hostvars = plugin.inventory.get_host("default-testvm1").vars
+    cached_host = plugin._cache[CACHE_KEY][0]["objects"][0]["hosts"][0]
+    if expected is None:
+        assert "annotations" not in hostvars
+        assert "annotations" not in cached_host["hostvars"]
+    else:
+        assert hostvars["annotations"] == expected
+
+
+@pytest.mark.parametrize(
+    "host_format",
+    [
+        "{namespace}-{name}",
+        "{name}.{namespace}",
+        "{name}-{uid}",
+        "x{{y}}{name}",
+        "{name!r}",
+        "{name:>10}",
+        "{name[0]}",
+    ],
+)
+def test_compile_host_format(host_format):
+    values = {"namespace": "default", "name": "testvm", "uid": "testvm-uid"}
+    format_host_name = kubevirt._compile_host_format(host_format)
+
+    assert format_host_name(**values) == host_format.format(**values)
+
+
+@pytest.mark.parametrize("host_format", ["{name", "{name}}", "name}"])
+def test_compile_host_format_invalid(host_format):
+    with pytest.raises(kubevirt.KubeVirtInventoryException, match="host_format"):
+        kubevirt.GetVmiOptions(host_format=host_format)
+
+
+@pytest.mark.parametrize(
+    "body,headers,expected",
+    [
+        (
+            b'{"details":{"causes":[{"message":"inner"}]},"message":"outer"}',
+            {"Content-Type": "application/json"},
+            "outer",
+        ),
+        (
+            b'{"kind":"Status","message":"forbidden"}',
+            {"Content-Type": "application/json"},
+            "forbidden",
+        ),
+        (b"plain error", {"Content-Type": "text/plain"}, b"plain error"),
+        (None, None, "403 Reason: Forbidden"),
+    ],
+)
+def test_format_dynamic_api_exc(body, headers, expected):
+    exc = ApiException(status=403, reason="Forbidden")
+    exc.body = body
+    exc.headers = headers
+
+    assert InventoryModule.format_dynamic_api_exc(ForbiddenError(exc)) == expected
+
+
+@pytest.mark.parametrize(
+    "namespaces",
+    [
+        ["default"],
+        ["default", "ns1", "ns2"],
+    ],
+)
+def test_ssh_services(mocker, inventory, namespaces):
+    client = FakeClient(
+        vmis=[
+            vmi("default", "testvm1", labels={"kubevirt.io/domain": "testvm1"}),
+            vmi("default", "testvm2", labels={"kubevirt.io/domain": "testvm2"}),
+            vmi("ns3", "testvm5", labels={"kubevirt.io/domain": "testvm5"}),
+        ],
+        services=[
+            service("default", "testvm1-ssh", "testvm1", "NodePort", 22, 30022),
+            service(
+                "default", "testvm2-ssh", "testvm2", "LoadBalancer", 2222, ip="1.2.3.4"
+            ),
+            service("ns3", "testvm5-ssh", "testvm5", "NodePort", 22, 30023),
+        ],
+    )
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": namespaces}])
+
+    common = {
+        "ansible_connection": "ssh",
+        "object_type": "vmi",
+        "annotations": {},
+        "cluster_name": None,
+        "resource_version": "1",
+        "vmi_active_pods": {},
+        "vmi_conditions": [],
+        "vmi_guest_os_info": {},
+        "vmi_interfaces": [{"name": "default", "ipAddress": "10.10.10.10"}],
+        "vmi_launcher_container_image_version": None,
+        "vmi_migration_method": None,
+        "vmi_migration_transport": None,
+        "vmi_node_name": "node01",
+        "vmi_phase": "Running",
+        "vmi_phase_transition_timestamps": [],
+        "vmi_qos_class": None,
+        "vmi_virtual_machine_revision_name": None,
+        "vmi_volume_status": [],
+    }
+    assert sorted(plugin.inventory.hosts) == ["default-testvm1", "default-testvm2"]
+    assert get_hostvars(plugin, "default-testvm1") == {
+        **common,
+        "ansible_host": "node01",
+        "ansible_port": 30022,
+        "labels": {"kubevirt.io/domain": "testvm1"},
+        "uid": "testvm1-uid",
+    }
+    assert get_hostvars(plugin, "default-testvm2") == {
+        **common,
+        "ansible_host": "1.2.3.4",
+        "ansible_port": 2222,
+        "labels": {"kubevirt.io/domain": "testvm2"},
+        "uid": "testvm2-uid",
+    }
+
+
+@pytest.mark.parametrize(
+    "network_name,expected",
+    [
+        (None, "10.10.10.10"),
+        ("default", "10.10.10.10"),
+        ("bridge-network", "192.168.0.10"),
+        ("other-network", None),
+        ("no-ip-network", None),
+    ],
+)
+def test_network_name(mocker, inventory, network_name, expected):
+    client = FakeClient(
+        vmis=[
+            vmi(
+                "default",
+                "testvm1",
+                interfaces=[
+                    {"name": "default", "ipAddress": "10.10.10.10"},
+                    {"name": "bridge-network", "ipAddress": "192.168.0.10"},
+                    {"name": "no-ip-network"},
+                ],
+            )
+        ]
+    )
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default"], "network_name": network_name}])
+
+    if expected is None:
+        assert "default-testvm1" not in plugin.inventory.hosts
+    else:
+        assert get_hostvars(plugin, "default-testvm1")["ansible_host"] == expected
+
+
+@pytest.mark.parametrize(
+    "connection,called,expected",
+    [
+        ({"network_name": "bridge-network"}, False, "192.168.0.10"),
+        ({"kube_secondary_dns": True}, False, "10.10.10.10"),
+        (
+            {"kube_secondary_dns": True, "network_name": "bridge-network"},
+            True,
+            "bridge-network.testvm1.default.vm.example.com",
+        ),
+        (
+            {
+                "kube_secondary_dns": True,
+                "network_name": "bridge-network",
+                "base_domain": "example.org",
+            },
+            False,
+            "bridge-network.testvm1.default.vm.example.org",
+        ),
+        (
+            {
+                "kube_secondary_dns": True,
+                "network_name": "bridge-network",
+                "base_domain": None,
+            },
+            False,
+            "bridge-network.testvm1.default.vm",
+        ),
+    ],
+)
+def test_cluster_domain(mocker, inventory, connection, called, expected):
+    client = FakeClient(
+        vmis=[
+            vmi(
+                "default",
+                "testvm1",
+                interfaces=[
+                    {"name": "default", "ipAddress": "10.10.10.10"},
+                    {"name": "bridge-network", "ipAddress": "192.168.0.10"},
+                ],
+            )
+        ]
+    )
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    get_cluster_domain = mocker.patch.object(
+        InventoryModule, "get_cluster_domain", return_value="example.com"
+    )
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default"], **connection}])
+
+    assert get_cluster_domain.called == called
+    assert get_hostvars(plugin, "default-testvm1")["ansible_host"] == expected
+
+
+def test_groups(mocker, inventory):
+    client = FakeClient(
+        vmis=[
+            vmi("default", "testvm1", labels={"app": "test", "x/y": "z.w"}),
+            vmi("default", "testvm2", labels={"app": "test", "tier": "db"}),
+            vmi("ns1", "testvm3", labels={"app": "other"}),
+        ]
+    )
+    mocker.patch.object(kubevirt, "get_api_client", return_value=client)
+    plugin = inventory()
+    run_setup(plugin, [{"namespaces": ["default", "ns1"]}])
+
+    groups = plugin.inventory.groups
+
+    def children(group):
+        return sorted(child.name for child in groups[group].child_groups)
+
+    def hosts(group):
+        return sorted(host.name for host in groups[group].hosts)
+
+    assert children("api_example_com_6443") == ["namespace_default", "namespace_ns1"]
+    assert children("namespace_default") == ["namespace_default_vmis"]
+    assert hosts("namespace_default_vmis") == ["default-testvm1", "default-testvm2"]
+    assert children("namespace_ns1") == ["namespace_ns1_vmis"]
+    assert hosts("namespace_ns1_vmis") == ["ns1-testvm3"]
+    assert sorted(group for group in groups if group.startswith("label_")) == [
+        "label_app_other",
+        "label_app_test",
+        "label_tier_db",
+        "label_x_y_z_w",
+    ]
+    assert hosts("label_app_test") == ["default-testvm1", "default-testvm2"]
+    assert hosts("label_app_other") == ["ns1-testvm3"]
+    assert hosts("label_tier_db") == ["default-testvm2"]
+    assert hosts("label_x_y_z_w") == ["default-testvm1"]